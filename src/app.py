@@ -1,9 +1,17 @@
-from datetime import datetime
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, abort, request, render_template
 from flask_sqlalchemy import SQLAlchemy
+import sqlalchemy as sa
 from sqlalchemy import UniqueConstraint, func
+from sqlalchemy.exc import IntegrityError
 from flask_cors import CORS
+import orjson
 import os
+import time
+
+try:
+    import redis
+except ImportError:  # caching is optional
+    redis = None
 
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
@@ -13,20 +21,46 @@ CORS(app)
 db_path = os.path.join(os.path.dirname(__file__), "app.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Pooled connections shared across threaded workers; with WAL, readers don't block on writers.
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+    "connect_args": {"check_same_thread": False, "timeout": 30},
+    "insertmanyvalues_page_size": 1000,
+}
 
 db = SQLAlchemy(app)
 
+# Optional Redis cache for hot reads; disabled unless REDIS_URL is set.
+REDIS_URL = os.environ.get("REDIS_URL")
+cache = redis.Redis.from_url(REDIS_URL) if redis and REDIS_URL else None
+
 
 # Constants
 MONTHLY_BASE_CREDITS = 100
 MONTHLY_SENDING_LIMIT = 100
 CARRY_FORWARD_CAP = 50
 REDEMPTION_RATE_INR = 5
+LEADERBOARD_CACHE_TTL = 30  # seconds
+LEADERBOARD_MAX_LIMIT = 100
+ENDORSE_DEDUPE_TTL = 24 * 60 * 60  # seconds
+MAX_BULK_RECOGNITIONS = 1000
+
+
+# (epoch minute, "YYYY-MM"). A UTC month always starts on a minute boundary,
+# so the cached value is exact until the minute changes.
+_month_cache = (-1, "")
 
 
 def current_month_str():
-    now = datetime.utcnow()
-    return f"{now.year:04d}-{now.month:02d}"
+    global _month_cache
+    ts = time.time()
+    minute = int(ts // 60)
+    if _month_cache[0] != minute:
+        now = time.gmtime(ts)
+        _month_cache = (minute, f"{now.tm_year:04d}-{now.tm_mon:02d}")
+    return _month_cache[1]
 
 
 class Student(db.Model):
@@ -42,56 +76,250 @@ class Student(db.Model):
     # Receiving side (redeemable balance). Redemptions subtract from this.
     received_balance = db.Column(db.Integer, nullable=False, default=0)
 
+    # Lifetime leaderboard counters, maintained by the recognition/endorsement writes.
+    # Never reduced by redemptions.
+    total_received = db.Column(db.Integer, nullable=False, default=0)
+    recognitions_count = db.Column(db.Integer, nullable=False, default=0)
+    endorsements_received_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_students_leaderboard", total_received.desc(), id),
+    )
+
 
 class Recognition(db.Model):
     __tablename__ = "recognitions"
     id = db.Column(db.Integer, primary_key=True)
-    sender_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
+    sender_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
     recipient_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
     amount = db.Column(db.Integer, nullable=False)
     message = db.Column(db.String(500))
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp(), index=True)
+
+    __table_args__ = (
+        # recipient filter + newest-first ordering; also serves leaderboard GROUP BY recipient_id
+        db.Index("ix_recog_recipient_created", recipient_id, created_at.desc()),
+    )
 
 
 class Endorsement(db.Model):
     __tablename__ = "endorsements"
     id = db.Column(db.Integer, primary_key=True)
     recognition_id = db.Column(db.Integer, db.ForeignKey("recognitions.id"), nullable=False)
-    endorser_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    endorser_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
 
     __table_args__ = (
+        # also serves lookups by recognition_id (leading column)
         UniqueConstraint("recognition_id", "endorser_id", name="uq_endorse_once"),
     )
 
 
+# Correlated count, selectable alongside the recognition's own columns; deferred so
+# ordinary Recognition loads skip it. Attached here because it needs Endorsement.
+Recognition.endorsement_count = db.column_property(
+    sa.select(func.count(Endorsement.id))
+    .where(Endorsement.recognition_id == Recognition.id)
+    .correlate_except(Endorsement)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+
 class Redemption(db.Model):
     __tablename__ = "redemptions"
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
     amount = db.Column(db.Integer, nullable=False)
     voucher_value_in_inr = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+# Hot-path INSERTs built once; executed with per-request parameter dicts.
+_recognitions = Recognition.__table__
+_endorsements = Endorsement.__table__
+_redemptions = Redemption.__table__
+_counted = _endorsements.alias("counted")
+
+INSERT_RECOGNITION = sa.insert(_recognitions).returning(
+    _recognitions.c.id, _recognitions.c.created_at, sort_by_parameter_order=True
+)
+# RETURNING also reports the recognition's endorsement total, including the new row
+INSERT_ENDORSEMENT = sa.insert(_endorsements).returning(
+    _endorsements.c.id,
+    sa.select(func.count(_counted.c.id))
+    .where(_counted.c.recognition_id == sa.bindparam("for_recognition_id"))
+    .scalar_subquery()
+    .label("total"),
+)
+INSERT_REDEMPTION = sa.insert(_redemptions).returning(_redemptions.c.id, _redemptions.c.created_at)
+
+
+def monthly_reset_values(now_month):
+    """
+    SET values for an UPDATE that resets sending credits monthly with carry-forward
+    up to CARRY_FORWARD_CAP, and resets monthly_sent (sending limit tracker) to 0.
+    Guard the UPDATE on last_reset_month != now_month so it applies once per month.
+    """
+    return {
+        "available_credits": MONTHLY_BASE_CREDITS
+        + func.min(func.max(Student.available_credits, 0), CARRY_FORWARD_CAP),
+        "monthly_sent": 0,
+        "last_reset_month": now_month,
+    }
 
 
-def ensure_monthly_reset(student: Student):
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
     """
-    Resets sending credits monthly with carry-forward up to CARRY_FORWARD_CAP.
-    Also resets monthly_sent (sending limit tracker) to 0 each new month.
+    Per-connection SQLite tuning: WAL lets readers run alongside a writer,
+    synchronous=NORMAL is durable under WAL with far fewer fsyncs.
     """
-    if not student:
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def cache_get(key):
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except redis.RedisError:
+        return None
+
+
+def cache_set(key, value, ttl):
+    if cache is None:
         return
-    now_month = current_month_str()
-    if student.last_reset_month != now_month:
-        carry = min(max(student.available_credits, 0), CARRY_FORWARD_CAP)
-        student.available_credits = MONTHLY_BASE_CREDITS + carry
-        student.monthly_sent = 0
-        student.last_reset_month = now_month
+    try:
+        cache.setex(key, ttl, value)
+    except redis.RedisError:
+        pass
+
+
+def cache_claim(key, ttl):
+    """
+    SET NX: False only if the key was already claimed. Without a reachable
+    cache every claim succeeds and the database constraint decides.
+    """
+    if cache is None:
+        return True
+    try:
+        return bool(cache.set(key, 1, nx=True, ex=ttl))
+    except redis.RedisError:
+        return True
+
+
+def cache_delete(key):
+    if cache is None:
+        return
+    try:
+        cache.delete(key)
+    except redis.RedisError:
+        pass
+
+
+# one cached page per allowed limit; fixed, so invalidation is a single DEL
+LEADERBOARD_CACHE_KEYS = [f"lb:{n}" for n in range(1, LEADERBOARD_MAX_LIMIT + 1)]
+
+
+def invalidate_leaderboard():
+    """Drops every cached leaderboard page (one key per limit)."""
+    if cache is None:
+        return
+    try:
+        cache.delete(*LEADERBOARD_CACHE_KEYS)
+    except redis.RedisError:
+        pass
+
+
+def _add_student_counters():
+    """
+    Adds the leaderboard counter columns to a students table created before they
+    existed, backfilling them from recognitions and endorsements.
+    """
+    existing = {c["name"] for c in sa.inspect(db.engine).get_columns("students")}
+    missing = [
+        name
+        for name in ("total_received", "recognitions_count", "endorsements_received_count")
+        if name not in existing
+    ]
+    if not missing:
+        return
+    with db.engine.begin() as conn:
+        for name in missing:
+            conn.execute(sa.text(f"ALTER TABLE students ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(
+            sa.update(Student).values(
+                total_received=sa.select(func.coalesce(func.sum(Recognition.amount), 0))
+                .where(Recognition.recipient_id == Student.id)
+                .scalar_subquery(),
+                recognitions_count=sa.select(func.count(Recognition.id))
+                .where(Recognition.recipient_id == Student.id)
+                .scalar_subquery(),
+                endorsements_received_count=sa.select(func.count(Endorsement.id))
+                .join(Recognition, Endorsement.recognition_id == Recognition.id)
+                .where(Recognition.recipient_id == Student.id)
+                .scalar_subquery(),
+            )
+        )
+
+
+def _add_created_at_defaults():
+    """
+    Rebuilds tables from an older app.db whose created_at has no server default
+    (SQLite can't change a column default in place). Indexes are recreated below.
+    """
+    inspector = sa.inspect(db.engine)
+    stale = [
+        table
+        for table in (Recognition.__table__, Endorsement.__table__, Redemption.__table__)
+        if any(
+            c["name"] == "created_at" and c["default"] is None
+            for c in inspector.get_columns(table.name)
+        )
+    ]
+    if not stale:
+        return
+    with db.engine.connect() as conn:
+        # must be off while a referenced table is dropped and replaced
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.commit()
+        with conn.begin():
+            for table in stale:
+                tmp = f"{table.name}_rebuild"
+                ddl = str(sa.schema.CreateTable(table).compile(db.engine))
+                conn.exec_driver_sql(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {tmp} ", 1))
+                cols = ", ".join(c.name for c in table.columns)
+                conn.exec_driver_sql(f"INSERT INTO {tmp} ({cols}) SELECT {cols} FROM {table.name}")
+                conn.exec_driver_sql(f"DROP TABLE {table.name}")
+                conn.exec_driver_sql(f"ALTER TABLE {tmp} RENAME TO {table.name}")
+        conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+        conn.commit()
+
+
+def json_response(payload, status=200):
+    """Serializes with orjson; naive datetimes are UTC and rendered with a trailing "Z"."""
+    body = orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+    return Response(body, status=status, mimetype="application/json")
 
 
 """Initialize DB (Flask 3 removed before_first_request)."""
 with app.app_context():
+    # registered before create_all so the first pooled connection is tuned too
+    sa.event.listen(db.engine, "connect", _set_sqlite_pragmas)
     db.create_all()
+    _add_student_counters()
+    _add_created_at_defaults()
+    # create_all skips existing tables, so add any indexes missing from an older app.db
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
 
 
 @app.route("/")
@@ -105,27 +333,52 @@ def create_student():
     data = request.get_json(force=True)
     name = (data or {}).get("name")
     if not name:
-        return jsonify({"error": "name is required"}), 400
-    if Student.query.filter_by(name=name).first():
-        return jsonify({"error": "student with this name already exists"}), 409
-    s = Student(
-        name=name,
-        available_credits=MONTHLY_BASE_CREDITS,
-        monthly_sent=0,
-        last_reset_month=current_month_str(),
-        received_balance=0,
-    )
-    db.session.add(s)
-    db.session.commit()
-    return jsonify(student_to_dict(s)), 201
+        return json_response({"error": "name is required"}, 400)
+    with db.session.no_autoflush, db.session.begin():
+        if Student.query.filter_by(name=name).first():
+            return json_response({"error": "student with this name already exists"}, 409)
+        s = Student(
+            name=name,
+            available_credits=MONTHLY_BASE_CREDITS,
+            monthly_sent=0,
+            last_reset_month=current_month_str(),
+            received_balance=0,
+        )
+        db.session.add(s)
+        db.session.flush()
+        payload = student_to_dict(s)
+    return json_response(payload, 201)
+
+
+STUDENT_COLUMNS = (
+    Student.id,
+    Student.name,
+    Student.available_credits,
+    Student.monthly_sent,
+    Student.last_reset_month,
+    Student.received_balance,
+)
 
 
 @app.route("/students/<int:student_id>", methods=["GET"])
 def get_student(student_id):
-    s = Student.query.get_or_404(student_id)
-    ensure_monthly_reset(s)
-    db.session.commit()
-    return jsonify(student_to_dict(s))
+    select_student = sa.select(*STUDENT_COLUMNS).where(Student.id == student_id)
+    with db.engine.connect() as conn:
+        s = conn.execute(select_student).one_or_none()
+        if s is None:
+            abort(404)
+
+        # Only write when the month has rolled over; the common case is a single SELECT.
+        now_month = current_month_str()
+        if s.last_reset_month != now_month:
+            conn.execute(
+                sa.update(Student)
+                .where(Student.id == student_id, Student.last_reset_month != now_month)
+                .values(**monthly_reset_values(now_month))
+            )
+            conn.commit()
+            s = conn.execute(select_student).one()
+    return json_response(student_to_dict(s))
 
 
 def student_to_dict(s: Student):
@@ -152,55 +405,178 @@ def create_recognition():
         recipient_id = int(data.get("recipient_id"))
         amount = int(data.get("amount"))
     except Exception:
-        return jsonify({"error": "sender_id, recipient_id, amount must be integers"}), 400
+        return json_response({"error": "sender_id, recipient_id, amount must be integers"}, 400)
 
     if amount <= 0:
-        return jsonify({"error": "amount must be > 0"}), 400
+        return json_response({"error": "amount must be > 0"}, 400)
     if sender_id == recipient_id:
-        return jsonify({"error": "self-recognition is not allowed"}), 400
-
-    sender = Student.query.get(sender_id)
-    recipient = Student.query.get(recipient_id)
-    if not sender or not recipient:
-        return jsonify({"error": "sender or recipient not found"}), 404
-
-    # Monthly reset checks
-    ensure_monthly_reset(sender)
-    ensure_monthly_reset(recipient)
-
-    # Rule: cannot exceed available balance
-    if sender.available_credits < amount:
-        return jsonify({"error": "insufficient available credits"}), 400
-
-    # Rule: cannot exceed monthly sending limit
-    remaining_limit = MONTHLY_SENDING_LIMIT - sender.monthly_sent
-    if amount > remaining_limit:
-        return jsonify({"error": "monthly sending limit exceeded"}), 400
-
-    msg = data.get("message")
-    rec = Recognition(
-        sender_id=sender.id,
-        recipient_id=recipient.id,
-        amount=amount,
-        message=msg,
-    )
+        return json_response({"error": "self-recognition is not allowed"}, 400)
 
-    # Apply effects
-    sender.available_credits -= amount
-    sender.monthly_sent += amount
-    recipient.received_balance += amount
+    with db.session.no_autoflush, db.session.begin():
+        # both rows in one round-trip; FOR UPDATE locks them on backends that support it
+        rows = {
+            s.id: s
+            for s in Student.query.filter(Student.id.in_((sender_id, recipient_id))).with_for_update().all()
+        }
+        sender, recipient = rows.get(sender_id), rows.get(recipient_id)
+        if not sender or not recipient:
+            return json_response({"error": "sender or recipient not found"}, 404)
+
+        # Monthly reset checks, guarded in SQL so a stale read can't undo another debit
+        now_month = current_month_str()
+        db.session.execute(
+            sa.update(Student)
+            .where(Student.id.in_((sender.id, recipient.id)), Student.last_reset_month != now_month)
+            .values(**monthly_reset_values(now_month))
+            .execution_options(synchronize_session=False)
+        )
 
-    db.session.add(rec)
-    db.session.commit()
+        # Rules: cannot exceed available balance or monthly sending limit.
+        # Checked in the UPDATE itself so concurrent requests can't both pass.
+        debit = db.session.execute(
+            sa.update(Student)
+            .where(
+                Student.id == sender.id,
+                Student.available_credits >= amount,
+                MONTHLY_SENDING_LIMIT - Student.monthly_sent >= amount,
+            )
+            .values(
+                available_credits=Student.available_credits - amount,
+                monthly_sent=Student.monthly_sent + amount,
+            )
+        )
+        if debit.rowcount == 0:
+            available = db.session.execute(
+                sa.select(Student.available_credits).where(Student.id == sender.id)
+            ).scalar_one()
+            if available < amount:
+                error = "insufficient available credits"
+            else:
+                error = "monthly sending limit exceeded"
+            db.session.rollback()
+            return json_response({"error": error}, 400)
+
+        msg = data.get("message")
+        rec = db.session.execute(
+            INSERT_RECOGNITION,
+            {"sender_id": sender.id, "recipient_id": recipient.id, "amount": amount, "message": msg},
+        ).one()
+
+        # Apply effects
+        db.session.execute(
+            sa.update(Student)
+            .where(Student.id == recipient.id)
+            .values(
+                received_balance=Student.received_balance + amount,
+                total_received=Student.total_received + amount,
+                recognitions_count=Student.recognitions_count + 1,
+            )
+        )
+        payload = {
+            "recognition_id": rec.id,
+            "created_at": rec.created_at,
+            "sender": student_to_brief(sender),
+            "recipient": student_to_brief(recipient),
+            "amount": amount,
+            "message": msg,
+        }
+    invalidate_leaderboard()
+    return json_response(payload, 201)
 
-    return jsonify({
-        "recognition_id": rec.id,
-        "created_at": rec.created_at.isoformat() + "Z",
-        "sender": student_to_brief(sender),
-        "recipient": student_to_brief(recipient),
-        "amount": amount,
-        "message": msg,
-    }), 201
+
+@app.route("/recognitions/bulk", methods=["POST"])
+def create_recognitions_bulk():
+    """
+    Inserts a list of recognitions in one transaction (all or nothing), applying
+    the same rules as POST /recognitions to each sender's combined total.
+    """
+    data = request.get_json(force=True)
+    if not isinstance(data, list) or not data:
+        return json_response({"error": "body must be a non-empty list of recognitions"}, 400)
+    if len(data) > MAX_BULK_RECOGNITIONS:
+        return json_response({"error": f"at most {MAX_BULK_RECOGNITIONS} recognitions per request"}, 400)
+
+    rows = []
+    sent = {}
+    received = {}
+    received_count = {}
+    for i, item in enumerate(data):
+        try:
+            sender_id = int(item.get("sender_id"))
+            recipient_id = int(item.get("recipient_id"))
+            amount = int(item.get("amount"))
+        except Exception:
+            return json_response({"error": "sender_id, recipient_id, amount must be integers", "index": i}, 400)
+        if amount <= 0:
+            return json_response({"error": "amount must be > 0", "index": i}, 400)
+        if sender_id == recipient_id:
+            return json_response({"error": "self-recognition is not allowed", "index": i}, 400)
+        rows.append({
+            "sender_id": sender_id,
+            "recipient_id": recipient_id,
+            "amount": amount,
+            "message": item.get("message"),
+        })
+        sent[sender_id] = sent.get(sender_id, 0) + amount
+        received[recipient_id] = received.get(recipient_id, 0) + amount
+        received_count[recipient_id] = received_count.get(recipient_id, 0) + 1
+
+    student_ids = set(sent) | set(received)
+    with db.session.no_autoflush, db.session.begin():
+        students = {
+            s.id: s for s in Student.query.filter(Student.id.in_(student_ids)).with_for_update().all()
+        }
+        missing = sorted(student_ids - set(students))
+        if missing:
+            return json_response({"error": "sender or recipient not found", "student_ids": missing}, 404)
+
+        now_month = current_month_str()
+        db.session.execute(
+            sa.update(Student)
+            .where(Student.id.in_(list(sent)), Student.last_reset_month != now_month)
+            .values(**monthly_reset_values(now_month))
+            .execution_options(synchronize_session=False)
+        )
+
+        # One conditional debit per sender for their combined total
+        for sender_id, total in sent.items():
+            debit = db.session.execute(
+                sa.update(Student)
+                .where(
+                    Student.id == sender_id,
+                    Student.available_credits >= total,
+                    MONTHLY_SENDING_LIMIT - Student.monthly_sent >= total,
+                )
+                .values(
+                    available_credits=Student.available_credits - total,
+                    monthly_sent=Student.monthly_sent + total,
+                )
+            )
+            if debit.rowcount == 0:
+                available = db.session.execute(
+                    sa.select(Student.available_credits).where(Student.id == sender_id)
+                ).scalar_one()
+                if available < total:
+                    error = "insufficient available credits"
+                else:
+                    error = "monthly sending limit exceeded"
+                db.session.rollback()
+                return json_response({"error": error, "sender_id": sender_id}, 400)
+
+        ids = db.session.execute(INSERT_RECOGNITION, rows).scalars().all()
+
+        for recipient_id, total in received.items():
+            db.session.execute(
+                sa.update(Student)
+                .where(Student.id == recipient_id)
+                .values(
+                    received_balance=Student.received_balance + total,
+                    total_received=Student.total_received + total,
+                    recognitions_count=Student.recognitions_count + received_count[recipient_id],
+                )
+            )
+    invalidate_leaderboard()
+    return json_response({"created": len(ids), "recognition_ids": ids}, 201)
 
 
 def student_to_brief(s: Student):
@@ -211,39 +587,55 @@ def student_to_brief(s: Student):
 def list_recognitions():
     sender_id = request.args.get("sender_id", type=int)
     recipient_id = request.args.get("recipient_id", type=int)
-    q = Recognition.query
+    # plain column rows; no Recognition instances are built for a read-only list
+    stmt = sa.select(
+        Recognition.id,
+        Recognition.sender_id,
+        Recognition.recipient_id,
+        Recognition.amount,
+        Recognition.message,
+        Recognition.created_at,
+    )
     if sender_id is not None:
-        q = q.filter_by(sender_id=sender_id)
+        stmt = stmt.where(Recognition.sender_id == sender_id)
     if recipient_id is not None:
-        q = q.filter_by(recipient_id=recipient_id)
-    q = q.order_by(Recognition.created_at.desc())
-    items = []
-    for r in q.limit(200).all():
-        items.append({
-            "id": r.id,
-            "sender_id": r.sender_id,
-            "recipient_id": r.recipient_id,
-            "amount": r.amount,
-            "message": r.message,
-            "created_at": r.created_at.isoformat() + "Z",
-            "endorsements": Endorsement.query.filter_by(recognition_id=r.id).count(),
-        })
-    return jsonify(items)
+        stmt = stmt.where(Recognition.recipient_id == recipient_id)
+    # created_at has second precision; id keeps same-second rows newest-first
+    stmt = stmt.order_by(Recognition.created_at.desc(), Recognition.id.desc()).limit(200)
+    with db.engine.connect() as conn:
+        rows = conn.execute(stmt).mappings().all()
+
+        # endorsement counts for the whole page in one grouped query
+        counts = {}
+        if rows:
+            counts = dict(
+                conn.execute(
+                    sa.select(Endorsement.recognition_id, func.count(Endorsement.id))
+                    .where(Endorsement.recognition_id.in_([r["id"] for r in rows]))
+                    .group_by(Endorsement.recognition_id)
+                ).all()
+            )
+
+    items = [{**r, "endorsements": counts.get(r["id"], 0)} for r in rows]
+    return json_response(items)
 
 
 @app.route("/recognitions/<int:recognition_id>", methods=["GET"])
 def get_recognition(recognition_id):
-    r = Recognition.query.get_or_404(recognition_id)
-    endorses = Endorsement.query.filter_by(recognition_id=r.id).count()
-    return jsonify({
-        "id": r.id,
-        "sender_id": r.sender_id,
-        "recipient_id": r.recipient_id,
-        "amount": r.amount,
-        "message": r.message,
-        "created_at": r.created_at.isoformat() + "Z",
-        "endorsements": endorses,
-    })
+    stmt = sa.select(
+        Recognition.id,
+        Recognition.sender_id,
+        Recognition.recipient_id,
+        Recognition.amount,
+        Recognition.message,
+        Recognition.created_at,
+        Recognition.endorsement_count.label("endorsements"),
+    ).where(Recognition.id == recognition_id)
+    with db.engine.connect() as conn:
+        r = conn.execute(stmt).mappings().one_or_none()
+    if r is None:
+        abort(404)
+    return json_response(dict(r))
 
 
 # --------------------------- Endorsements ---------------------------
@@ -254,23 +646,47 @@ def create_endorsement():
         recognition_id = int(data.get("recognition_id"))
         endorser_id = int(data.get("endorser_id"))
     except Exception:
-        return jsonify({"error": "recognition_id and endorser_id must be integers"}), 400
-
-    rec = Recognition.query.get(recognition_id)
-    if not rec:
-        return jsonify({"error": "recognition not found"}), 404
-    if not Student.query.get(endorser_id):
-        return jsonify({"error": "endorser not found"}), 404
+        return json_response({"error": "recognition_id and endorser_id must be integers"}, 400)
 
-    existing = Endorsement.query.filter_by(recognition_id=recognition_id, endorser_id=endorser_id).first()
-    if existing:
-        return jsonify({"error": "each endorser can endorse only once"}), 409
+    # replayed/duplicate endorsements are turned away before touching the database
+    dedupe_key = f"endorse:{recognition_id}:{endorser_id}"
+    if not cache_claim(dedupe_key, ENDORSE_DEDUPE_TTL):
+        return json_response({"error": "each endorser can endorse only once"}, 409)
 
-    e = Endorsement(recognition_id=recognition_id, endorser_id=endorser_id)
-    db.session.add(e)
-    db.session.commit()
-    count = Endorsement.query.filter_by(recognition_id=recognition_id).count()
-    return jsonify({"endorsement_id": e.id, "recognition_id": recognition_id, "total_endorsements": count}), 201
+    try:
+        with db.session.no_autoflush, db.session.begin():
+            rec = Recognition.query.get(recognition_id)
+            if not rec:
+                cache_delete(dedupe_key)
+                return json_response({"error": "recognition not found"}, 404)
+            if not Student.query.get(endorser_id):
+                cache_delete(dedupe_key)
+                return json_response({"error": "endorser not found"}, 404)
+
+            # uq_endorse_once rejects duplicates; the running total comes back with the insert
+            try:
+                e = db.session.execute(
+                    INSERT_ENDORSEMENT,
+                    {
+                        "recognition_id": recognition_id,
+                        "endorser_id": endorser_id,
+                        "for_recognition_id": recognition_id,
+                    },
+                ).one()
+            except IntegrityError:
+                db.session.rollback()
+                return json_response({"error": "each endorser can endorse only once"}, 409)
+            db.session.execute(
+                sa.update(Student)
+                .where(Student.id == rec.recipient_id)
+                .values(endorsements_received_count=Student.endorsements_received_count + 1)
+            )
+    except BaseException:
+        # nothing was committed, so a retry must not be turned away as a duplicate
+        cache_delete(dedupe_key)
+        raise
+    invalidate_leaderboard()
+    return json_response({"endorsement_id": e.id, "recognition_id": recognition_id, "total_endorsements": e.total}, 201)
 
 
 # ---------------------------- Redemptions ---------------------------
@@ -281,92 +697,69 @@ def redeem_credits():
         student_id = int(data.get("student_id"))
         amount = int(data.get("amount"))
     except Exception:
-        return jsonify({"error": "student_id and amount must be integers"}), 400
+        return json_response({"error": "student_id and amount must be integers"}, 400)
 
     if amount <= 0:
-        return jsonify({"error": "amount must be > 0"}), 400
-
-    s = Student.query.get(student_id)
-    if not s:
-        return jsonify({"error": "student not found"}), 404
-
-    # Can only redeem received credits
-    if s.received_balance < amount:
-        return jsonify({"error": "insufficient received credits to redeem"}), 400
-
-    value_in_inr = amount * REDEMPTION_RATE_INR
-    red = Redemption(student_id=s.id, amount=amount, voucher_value_in_inr=value_in_inr)
-
-    s.received_balance -= amount
-    db.session.add(red)
-    db.session.commit()
-
-    return jsonify({
+        return json_response({"error": "amount must be > 0"}, 400)
+
+    with db.session.no_autoflush, db.session.begin():
+        s = Student.query.get(student_id)
+        if not s:
+            return json_response({"error": "student not found"}, 404)
+
+        # Can only redeem received credits; checked in the UPDATE so concurrent
+        # redemptions can't both pass, and before the insert so a rejection stores nothing
+        debit = db.session.execute(
+            sa.update(Student)
+            .where(Student.id == s.id, Student.received_balance >= amount)
+            .values(received_balance=Student.received_balance - amount)
+        )
+        if debit.rowcount == 0:
+            db.session.rollback()
+            return json_response({"error": "insufficient received credits to redeem"}, 400)
+
+        value_in_inr = amount * REDEMPTION_RATE_INR
+        red = db.session.execute(
+            INSERT_REDEMPTION,
+            {"student_id": s.id, "amount": amount, "voucher_value_in_inr": value_in_inr},
+        ).one()
+    return json_response({
         "redemption_id": red.id,
-        "student_id": s.id,
+        "student_id": student_id,
         "amount": amount,
         "voucher_value_in_inr": value_in_inr,
-        "created_at": red.created_at.isoformat() + "Z",
-    }), 201
+        "created_at": red.created_at,
+    }, 201)
 
 
 # ---------------------------- Leaderboard ---------------------------
 @app.route("/leaderboard", methods=["GET"])
 def leaderboard():
     limit = request.args.get("limit", default=10, type=int)
-    limit = max(1, min(limit, 100))
-
-    # total credits received per student
-    totals_subq = (
-        db.session.query(
-            Recognition.recipient_id.label("student_id"),
-            func.coalesce(func.sum(Recognition.amount), 0).label("total_received"),
-            func.count(Recognition.id).label("recognitions_count"),
-        )
-        .group_by(Recognition.recipient_id)
-        .subquery()
-    )
+    limit = max(1, min(limit, LEADERBOARD_MAX_LIMIT))
 
-    # endorsements per recipient across all their recognitions
-    endorses_subq = (
-        db.session.query(
-            Recognition.recipient_id.label("student_id"),
-            func.coalesce(func.count(Endorsement.id), 0).label("endorsements_count"),
-        )
-        .join(Endorsement, Endorsement.recognition_id == Recognition.id, isouter=True)
-        .group_by(Recognition.recipient_id)
-        .subquery()
-    )
+    cache_key = f"lb:{limit}"
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return Response(cached, mimetype="application/json")
 
-    q = (
-        db.session.query(
-            Student.id,
+    # counters are maintained on write, so this is an index scan of the top rows
+    stmt = (
+        sa.select(
+            Student.id.label("student_id"),
             Student.name,
-            func.coalesce(totals_subq.c.total_received, 0).label("total_received"),
-            func.coalesce(totals_subq.c.recognitions_count, 0).label("recognitions_count"),
-            func.coalesce(endorses_subq.c.endorsements_count, 0).label("endorsements_count"),
+            Student.total_received.label("total_credits_received"),
+            Student.recognitions_count,
+            Student.endorsements_received_count.label("endorsements_count"),
         )
-        .outerjoin(totals_subq, totals_subq.c.student_id == Student.id)
-        .outerjoin(endorses_subq, endorses_subq.c.student_id == Student.id)
+        .order_by(Student.total_received.desc(), Student.id.asc())
+        .limit(limit)
     )
-
-    q = q.order_by(
-        func.coalesce(totals_subq.c.total_received, 0).desc(),
-        Student.id.asc(),
-    ).limit(limit)
-
-    rows = q.all()
-    result = [
-        {
-            "student_id": row.id,
-            "name": row.name,
-            "total_credits_received": int(row.total_received or 0),
-            "recognitions_count": int(row.recognitions_count or 0),
-            "endorsements_count": int(row.endorsements_count or 0),
-        }
-        for row in rows
-    ]
-    return jsonify(result)
+    with db.engine.connect() as conn:
+        rows = conn.execute(stmt).mappings().all()
+    resp = json_response([dict(row) for row in rows])
+    cache_set(cache_key, resp.get_data(), LEADERBOARD_CACHE_TTL)
+    return resp
 
 
 # -------------------------- Admin utilities -------------------------
@@ -374,17 +767,19 @@ def leaderboard():
 def admin_reset_month():
     # Reset all students for new month (idempotent for current month)
     now_month = current_month_str()
-    students = Student.query.all()
-    updated_ids = []
-    for s in students:
-        if s.last_reset_month != now_month:
-            ensure_monthly_reset(s)
-            updated_ids.append(s.id)
+    processed = db.session.query(func.count(Student.id)).scalar()
+    updated_ids = db.session.execute(
+        sa.update(Student)
+        .where(Student.last_reset_month != now_month)
+        .values(**monthly_reset_values(now_month))
+        .returning(Student.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
     db.session.commit()
-    return jsonify({
+    return json_response({
         "status": "ok",
         "reset_month": now_month,
-        "processed": len(students),
+        "processed": processed,
         "updated": len(updated_ids),
         "updated_ids": updated_ids,
     })
@@ -392,7 +787,7 @@ def admin_reset_month():
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return json_response({"status": "ok"})
 
 
 if __name__ == "__main__":